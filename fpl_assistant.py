@@ -22,90 +22,373 @@ details.
 """
 
 import argparse
+import functools
+import hashlib
 import json
+import os
 import sys
+import time
+import warnings
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
 try:
+    import numpy as np  # type: ignore
     import pandas as pd  # type: ignore
     import requests  # type: ignore
 except ImportError:
     sys.exit("This script requires the pandas and requests packages.")
 
+try:
+    import orjson  # type: ignore
+except ImportError:  # optional: faster JSON parsing
+    orjson = None
 
-def fetch_json(url: str) -> dict:
-    """Fetch JSON from the given URL with a browser user‑agent.
+try:
+    import pulp  # type: ignore
+except ImportError:  # optional: exact wildcard optimisation (PuLP >= 3.3)
+    pulp = None
 
-    The FPL API may return a 403 if the request does not include a
-    User‑Agent header.  Passing a common browser UA usually avoids
-    this issue.
-    """
-    headers = {
+
+def json_loads(data: bytes) -> dict:
+    """Parse JSON bytes, using orjson when it is installed."""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def json_dumps(obj: dict) -> bytes:
+    """Serialise `obj` to JSON bytes, using orjson when it is installed."""
+    return orjson.dumps(obj) if orjson is not None else json.dumps(obj).encode("utf-8")
+
+
+API_BASE = "https://fantasy.premierleague.com/api/"
+
+# Where raw API responses are cached between runs.
+CACHE_DIR = Path.home() / ".cache" / "fpl"
+
+# Cache lifetime in seconds per endpoint, matched on URL prefix.  Picks for a
+# gameweek are only published once its deadline has passed and never change
+# afterwards, so they are kept indefinitely (None).
+CACHE_TTLS: dict[str, float | None] = {
+    f"{API_BASE}bootstrap-static/": 60 * 60,
+    f"{API_BASE}fixtures/": 10 * 60,
+    f"{API_BASE}entry/": None,
+}
+
+# Position names per FPL element_type, in squad order
+POSITION_MAP = {1: "GKP", 2: "DEF", 3: "MID", 4: "FWD"}
+POSITIONS = list(POSITION_MAP.values())
+
+# Squad size per position (element_type) and the per-club player limit
+SQUAD_REQUIREMENTS = {1: 2, 2: 5, 3: 5, 4: 3}
+MAX_PER_TEAM = 3
+
+# Shared HTTP session so repeated requests reuse the same keep-alive
+# connection instead of repeating the TCP/TLS handshake.  It lives for the
+# whole process, so the Streamlit UI (which imports this module once and only
+# re-executes its own script on rerun) reuses it across reruns as well.
+SESSION = requests.Session()
+SESSION.headers.update(
+    {
+        # The FPL API may return a 403 if the request does not include a
+        # User‑Agent header.  Passing a common browser UA usually avoids
+        # this issue.
         "User-Agent": (
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
             "AppleWebKit/537.36 (KHTML, like Gecko) "
             "Chrome/118.0 Safari/537.36"
-        )
+        ),
+        "Accept-Encoding": "gzip, deflate",
     }
-    resp = requests.get(url, headers=headers)
+)
+
+
+def _cache_ttl(url: str) -> float | None:
+    """Return the cache lifetime for `url`, or 0 if it should not be cached."""
+    for prefix, ttl in CACHE_TTLS.items():
+        if url.startswith(prefix):
+            return ttl
+    return 0
+
+
+def disk_cached(func):
+    """Cache the JSON returned by `func(url)` on disk for the URL's TTL.
+
+    Each response is stored in ``CACHE_DIR/<sha1 of url>.json`` together with
+    the time it was fetched.  A fresh cache entry is returned without touching
+    the network; stale, missing or unreadable entries trigger a new request
+    whose result replaces the cached copy.
+    """
+
+    @functools.wraps(func)
+    def wrapper(url: str) -> dict:
+        ttl = _cache_ttl(url)
+        if ttl == 0:
+            return func(url)
+        path = CACHE_DIR / f"{hashlib.sha1(url.encode()).hexdigest()}.json"
+        try:
+            cached = json_loads(path.read_bytes())
+            if ttl is None or time.time() - cached["fetched_at"] < ttl:
+                return cached["payload"]
+        except (OSError, ValueError, KeyError):
+            pass
+        payload = func(url)
+        try:
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_bytes(json_dumps({"fetched_at": time.time(), "payload": payload}))
+            os.replace(tmp, path)
+        except OSError:
+            # A read-only or full disk should never break the assistant.
+            pass
+        return payload
+
+    return wrapper
+
+
+def clear_cache() -> None:
+    """Delete all cached API responses, frames and leftover temp files."""
+    for pattern in ("*.json", "*.parquet", "*.tmp"):
+        for path in CACHE_DIR.glob(pattern):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+
+def _drop_nested_columns(frame: pd.DataFrame) -> pd.DataFrame:
+    """Return `frame` without object columns holding lists or dicts."""
+    nested = [
+        col
+        for col in frame.columns[frame.dtypes == object]
+        if frame[col].map(lambda v: isinstance(v, (list, dict))).any()
+    ]
+    return frame.drop(columns=nested) if nested else frame
+
+
+def parquet_cached(name: str, ttl: float, parts: int = 1):
+    """Cache the DataFrame(s) returned by a loader as parquet files on disk.
+
+    Reading parquet is much faster than parsing the raw JSON and rebuilding
+    the frames, which matters on cold starts (e.g. a restarted Streamlit
+    server).  A loader returning a tuple of `parts` frames stores them as
+    ``CACHE_DIR/<name>-<i>.parquet``.  Parquet support needs pyarrow (or
+    fastparquet); without it, or on any read/write error, the loader simply
+    runs uncached.
+
+    Nested columns (lists/dicts per cell, e.g. the fixtures' ``stats``) do not
+    survive a parquet round-trip as Python objects, so they are dropped from
+    the returned frames on every call, cached or not.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper():
+            paths = [CACHE_DIR / f"{name}-{i}.parquet" for i in range(parts)]
+            try:
+                if all(time.time() - path.stat().st_mtime < ttl for path in paths):
+                    frames = tuple(pd.read_parquet(path) for path in paths)
+                    return frames if parts > 1 else frames[0]
+            except Exception:
+                # Missing files as well as pyarrow errors (ArrowInvalid, ...)
+                pass
+            result = func()
+            frames = tuple(
+                _drop_nested_columns(frame)
+                for frame in (result if parts > 1 else (result,))
+            )
+            try:
+                CACHE_DIR.mkdir(parents=True, exist_ok=True)
+                for frame, path in zip(frames, paths):
+                    tmp = path.with_suffix(".tmp")
+                    frame.to_parquet(tmp)
+                    os.replace(tmp, path)
+            except Exception:
+                pass
+            return frames if parts > 1 else frames[0]
+
+        return wrapper
+
+    return decorator
+
+
+@disk_cached
+def fetch_json(url: str) -> dict:
+    """Fetch JSON from the given URL using the shared HTTP session.
+
+    Responses are cached on disk (see :func:`disk_cached`), so repeated runs
+    within an endpoint's TTL do not hit the network at all.
+    """
+    resp = SESSION.get(url)
     resp.raise_for_status()
-    return resp.json()
+    return json_loads(resp.content)
 
 
+@parquet_cached("bootstrap", ttl=_cache_ttl(f"{API_BASE}bootstrap-static/"), parts=2)
 def load_bootstrap() -> tuple[pd.DataFrame, pd.DataFrame]:
     """Load overall FPL data (players and teams) from bootstrap‑static.
 
-    Returns a tuple (players_df, teams_df).
+    Returns a tuple (players_df, teams_df).  The API sends
+    `points_per_game` as a string; it is converted to float here so callers
+    never need to cast it.  Low-cardinality columns are stored compactly:
+    `status` as a categorical and the `team`/`element_type` codes as the
+    smallest integer type that fits.
     """
-    data = fetch_json("https://fantasy.premierleague.com/api/bootstrap-static/")
+    data = fetch_json(f"{API_BASE}bootstrap-static/")
     players_df = pd.DataFrame(data["elements"])
+    players_df["points_per_game"] = pd.to_numeric(players_df["points_per_game"], errors="coerce").fillna(0.0)
+    players_df["status"] = players_df["status"].astype("category")
+    for col in ("team", "element_type"):
+        players_df[col] = pd.to_numeric(players_df[col], downcast="integer")
     teams_df = pd.DataFrame(data["teams"])
     return players_df, teams_df
 
 
+@parquet_cached("fixtures", ttl=_cache_ttl(f"{API_BASE}fixtures/"))
 def load_fixtures() -> pd.DataFrame:
     """Load fixture list and convert to DataFrame."""
-    fixtures = fetch_json("https://fantasy.premierleague.com/api/fixtures/")
+    fixtures = fetch_json(f"{API_BASE}fixtures/")
     return pd.DataFrame(fixtures)
 
 
 def load_picks(manager_id: int, gameweek: int) -> dict:
     """Load the picks for the given manager and gameweek."""
     url = (
-        f"https://fantasy.premierleague.com/api/entry/{manager_id}/"
+        f"{API_BASE}entry/{manager_id}/"
         f"event/{gameweek}/picks/"
     )
     return fetch_json(url)
 
 
-def compute_fdr_for_team(
-    team_id: int, fixtures: pd.DataFrame, weeks_ahead: int = 6
-) -> float:
-    """Compute the average fixture difficulty for a team over the next N weeks.
+def compute_fdr_map(
+    fixtures: pd.DataFrame, weeks_ahead: int = 6, current_gw: int | None = None
+) -> dict[int, float]:
+    """Compute the average fixture difficulty for every team over the next N weeks.
 
     The `fixtures` DataFrame should come from the fixtures endpoint and
     contain the columns `event`, `team_h`, `team_a` and `difficulty` (for both
     home and away teams).  Difficulty ratings are 1–5 where 5 is hardest
     according to the official FPL Fixture Difficulty Rating【271463546749381†L119-L136】.
+    `current_gw` defaults to the earliest event in `fixtures`.  Returns a
+    mapping of team id to average difficulty; teams without an upcoming
+    fixture are absent from the mapping.
     """
-    current_gw = fixtures["event"].min()
-    upcoming = fixtures[(fixtures["event"] >= current_gw) & (fixtures["event"] < current_gw + weeks_ahead)]
-    difficulties = []
-    for _, row in upcoming.iterrows():
-        if row["team_h"] == team_id:
-            difficulties.append(row["team_h_difficulty"])
-        if row["team_a"] == team_id:
-            difficulties.append(row["team_a_difficulty"])
-    return sum(difficulties) / len(difficulties) if difficulties else 0.0
+    if current_gw is None:
+        current_gw = fixtures["event"].min()
+    mask = (fixtures["event"] >= current_gw) & (fixtures["event"] < current_gw + weeks_ahead)
+    home = fixtures.loc[mask, ["team_h", "team_h_difficulty"]].rename(
+        columns={"team_h": "team", "team_h_difficulty": "difficulty"}
+    )
+    away = fixtures.loc[mask, ["team_a", "team_a_difficulty"]].rename(
+        columns={"team_a": "team", "team_a_difficulty": "difficulty"}
+    )
+    both = pd.concat([home, away], ignore_index=True)
+    return both.groupby("team")["difficulty"].mean().to_dict()
 
 
-def generate_transfer_suggestions(
-    manager_id: int,
-    gameweek: int,
+def compute_fdr_for_team(
+    team_id: int, fixtures: pd.DataFrame, weeks_ahead: int = 6
+) -> float:
+    """Compute the average fixture difficulty for a team over the next N weeks.
+
+    Prefer :func:`compute_fdr_map` when the difficulty of several teams is
+    needed, as it scans the fixture list only once.
+    """
+    return compute_fdr_map(fixtures, weeks_ahead).get(team_id, 0.0)
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Return the positions of the `k` highest `scores`, best first.
+
+    Uses a linear-time partition and sorts only the selected `k` entries,
+    rather than sorting the whole array.
+    """
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    idx = np.argpartition(-scores, k - 1)[:k]
+    return idx[np.argsort(-scores[idx], kind="stable")]
+
+
+def score_and_topk(
+    ppg: np.ndarray, minutes_ratio: np.ndarray, fdr: np.ndarray, k: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Score players and return the positions and scores of the best `k`.
+
+    The score is points per game adjusted by minutes_ratio and divided by
+    FDR.  See :func:`top_k_indices` for the selection.
+    """
+    scores = ppg * minutes_ratio / (fdr + 1e-3)
+    idx = top_k_indices(scores, k)
+    return idx, scores[idx]
+
+
+def position_labels(element_type: pd.Series) -> pd.Categorical:
+    """Map FPL element types (1–4) to ordered position labels (GKP..FWD).
+
+    Any other element type (e.g. the 2024/25 assistant managers) becomes NaN.
+    """
+    return pd.Categorical(element_type.map(POSITION_MAP), categories=POSITIONS, ordered=True)
+
+
+def prepare_player_frame(
     players_df: pd.DataFrame,
     teams_df: pd.DataFrame,
     fixtures_df: pd.DataFrame,
+    team_short: dict[int, str],
+    gameweek: int,
+    weeks_ahead: int = 6,
+    current_gw: int | None = None,
+) -> pd.DataFrame:
+    """Build the enriched player table shared by all suggestion functions.
+
+    Team names are merged into the player data and the derived columns used
+    for scoring are added once: `fdr_next6` (average fixture difficulty over
+    the next `weeks_ahead` gameweeks), `minutes_ratio` (minutes played relative
+    to the maximum possible so far), the categorical `Position` label and
+    `Fixtures`, a summary of the team's next five fixtures (see
+    :func:`build_fixture_strings`).
+
+    :param players_df: full player data from bootstrap‑static.
+    :param teams_df: team information from bootstrap‑static.
+    :param fixtures_df: fixture list; the upcoming fixtures are sufficient.
+    :param team_short: mapping of team id to short name.
+    :param gameweek: current gameweek number (used to scale minutes).
+    :param weeks_ahead: how many upcoming fixtures to consider when computing FDR.
+    :param current_gw: first gameweek of the FDR window; defaults to the
+        earliest event in `fixtures_df`.
+    :returns: DataFrame with one row per player.
+    """
+    merged = players_df.merge(
+        teams_df[["id", "name", "short_name"]].rename(columns={"id": "team"}),
+        left_on="team",
+        right_on="team",
+        how="left",
+    )
+    if current_gw is None:
+        current_gw = int(fixtures_df["event"].min())
+    fdr_map = compute_fdr_map(fixtures_df, weeks_ahead, current_gw)
+    merged["fdr_next6"] = merged["team"].map(fdr_map).fillna(0.0)
+    # Fixture strings are per team, so build them once and map onto players
+    fix_map = build_fixture_strings(fixtures_df, team_short, current_gw=current_gw, num_games=5)
+    merged["Fixtures"] = merged["team"].map(fix_map).fillna("")
+    merged["Position"] = position_labels(merged["element_type"])
+    # Minutes ratio penalises players with limited playing time.  Players who
+    # have played more minutes are considered more reliable.  We scale minutes
+    # by the maximum possible minutes so far (gameweek × 90).
+    max_minutes = max(gameweek, 1) * 90
+    merged["minutes_ratio"] = merged["minutes"] / max_minutes
+    merged["minutes_ratio"] = merged["minutes_ratio"].fillna(0.0)
+    return merged
+
+
+def generate_transfer_suggestions(
+    manager_id: int,
+    gameweek: int,
+    merged: pd.DataFrame,
+    team_short: dict[int, str],
     top_n: int = 5,
+    picks_data: dict | None = None,
 ) -> pd.DataFrame:
     """Generate a simple list of potential transfer targets.
 
@@ -114,75 +397,45 @@ def generate_transfer_suggestions(
     are not currently in the squad.  It does not take budget or position
     constraints into account; see :func:`suggest_transfer_moves` for a
     budget‑aware replacement strategy.
+
+    `merged` is the player table built by :func:`prepare_player_frame` and
+    `team_short` maps team ids to short names.  `picks_data` may be passed
+    to reuse already loaded picks.
     """
-    picks_data = load_picks(manager_id, gameweek)
+    if picks_data is None:
+        picks_data = load_picks(manager_id, gameweek)
     current_elements = {p["element"] for p in picks_data["picks"]}
 
-    # Merge team data into players for lookup of team name/short name
-    merged = players_df.merge(
-        teams_df[["id", "name", "short_name"]].rename(columns={"id": "team"}),
-        left_on="team",
-        right_on="team",
-        how="left",
-    )
-    # Compute FDR per team for the next six weeks
-    fdr_map: dict[int, float] = {}
-    for team_id in merged["team"].unique():
-        fdr_map[team_id] = compute_fdr_for_team(team_id, fixtures_df, weeks_ahead=6)
-    merged["fdr_next6"] = merged["team"].map(fdr_map)
-
     # Exclude players already owned and those unavailable (status != 'a')
-    available = merged[(~merged["id"].isin(current_elements)) & (merged["status"] == "a")].copy()
-
-    # Adjust scores by minutes played.  Players who have played more minutes are
-    # considered more reliable.  We scale minutes by the maximum possible
-    # minutes so far (gameweek × 90) and multiply the form score by this
-    # availability ratio.
-    max_minutes = max(gameweek, 1) * 90
-    available["minutes_ratio"] = available["minutes"] / max_minutes
-    available["minutes_ratio"].fillna(0.0, inplace=True)
-    # Compute a score: points per game adjusted by minutes_ratio and divided by FDR
-    available["transfer_score"] = (
-        available["points_per_game"].astype(float) * available["minutes_ratio"]
-    ) / (available["fdr_next6"] + 1e-3)
-
-    # Sort by score and limit to top candidates
-    top = available.sort_values("transfer_score", ascending=False).head(top_n).copy().reset_index(drop=True)
-    # Add rank (1..n)
-    top.insert(0, "Rank", top.index + 1)
-    # Map element_type to position names
-    position_map = {1: "GKP", 2: "DEF", 3: "MID", 4: "FWD"}
-    top["Position"] = top["element_type"].map(position_map)
-    # Convert cost to millions for clarity
-    top["Price"] = top["now_cost"] / 10.0
+    owned = np.isin(merged["id"].to_numpy(), np.fromiter(current_elements, dtype=np.int64))
+    available = merged[~owned & (merged["status"] == "a")]
+
+    # Score the pool and limit to top candidates, keeping only the columns we show
+    idx, top_scores = score_and_topk(
+        available["points_per_game"].to_numpy(),
+        available["minutes_ratio"].to_numpy(),
+        available["fdr_next6"].to_numpy(),
+        top_n,
+    )
+    top = available.iloc[idx][["web_name", "team", "Position", "now_cost", "points_per_game", "fdr_next6", "Fixtures"]]
+    top = top.assign(
+        # Rank (1..n)
+        Rank=np.arange(1, len(top) + 1),
+        # Player's team short name
+        Team=top["team"].map(team_short),
+        # Convert cost to millions for clarity
+        Price=top["now_cost"] / 10.0,
+        transfer_score=top_scores,
+    )
     # Rename columns for readability
-    top.rename(
+    top = top.rename(
         columns={
             "web_name": "Name",
             "points_per_game": "Points_per_Game",
             "fdr_next6": "Avg_FDR_next6",
             "transfer_score": "Score",
-        },
-        inplace=True,
-    )
-    # Drop unnecessary columns (id, element_type, now_cost, minutes_ratio)
-    drop_cols = ["id", "element_type", "now_cost", "minutes_ratio"]
-    for col in drop_cols:
-        if col in top.columns:
-            top.drop(columns=col, inplace=True)
-    # Add player's own team short name and upcoming fixtures string
-    # Player's team short name
-    team_lookup = teams_df.set_index("id")["short_name"].to_dict()
-    top["Team"] = top["team"].map(team_lookup)
-    # Determine current gameweek from fixtures to align upcoming fixtures
-    current_gw = fixtures_df["event"].min()
-    top["Fixtures"] = top.apply(
-        lambda row: get_upcoming_fixtures(int(row["team"]), fixtures_df, teams_df, current_gw=current_gw, num_games=5),
-        axis=1,
+        }
     )
-    # Drop internal 'team' column as it is now represented by 'Team'
-    if "team" in top.columns:
-        top.drop(columns=["team"], inplace=True)
     # Reorder columns
     ordered_cols = [
         "Rank",
@@ -195,16 +448,15 @@ def generate_transfer_suggestions(
         "Score",
         "Fixtures",
     ]
-    return top[ordered_cols]
+    return top[ordered_cols].reset_index(drop=True)
 
 
 def suggest_transfer_moves(
     manager_id: int,
     gameweek: int,
-    players_df: pd.DataFrame,
-    teams_df: pd.DataFrame,
-    fixtures_df: pd.DataFrame,
+    merged: pd.DataFrame,
     max_transfers: int = 2,
+    picks_data: dict | None = None,
 ) -> list[tuple[str, str, float]]:
     """Suggest specific transfer moves based on budget and team composition.
 
@@ -217,51 +469,37 @@ def suggest_transfer_moves(
 
     :param manager_id: FPL manager entry ID.
     :param gameweek: current gameweek number.
-    :param players_df: full player data from bootstrap‑static.
-    :param teams_df: team information from bootstrap‑static.
-    :param fixtures_df: full fixture list.
+    :param merged: player table built by :func:`prepare_player_frame`.
     :param max_transfers: maximum number of transfer moves to suggest.
+    :param picks_data: picks as returned by :func:`load_picks`; loaded if omitted.
     :returns: a list of suggested transfers.
     """
-    picks_data = load_picks(manager_id, gameweek)
+    if picks_data is None:
+        picks_data = load_picks(manager_id, gameweek)
     picks = picks_data["picks"]
     bank = picks_data["entry_history"]["bank"] / 10.0
 
-    # Merge team data into players for FDR mapping
-    merged = players_df.merge(
-        teams_df[["id", "name", "short_name"]].rename(columns={"id": "team"}),
-        left_on="team",
-        right_on="team",
-        how="left",
+    # Score every player once; the score does not depend on who is being sold
+    scored = merged.assign(
+        score=(merged["points_per_game"] * merged["minutes_ratio"]) / (merged["fdr_next6"] + 1e-3)
     )
-    # Compute FDR per team for next six weeks
-    fdr_map: dict[int, float] = {}
-    for team_id in merged["team"].unique():
-        fdr_map[team_id] = compute_fdr_for_team(team_id, fixtures_df, weeks_ahead=6)
-    merged["fdr_next6"] = merged["team"].map(fdr_map)
-    merged["points_per_game"] = merged["points_per_game"].astype(float)
-    # Minutes ratio to penalise low‑minute players.  Use gameweek to compute max
-    max_minutes = max(gameweek, 1) * 90
-    merged["minutes_ratio"] = merged["minutes"] / max_minutes
-    merged["minutes_ratio"].fillna(0.0, inplace=True)
+    # Available players ranked best first; each sell only narrows this pool
+    pool = scored[scored["status"] == "a"].sort_values("score", ascending=False)
 
     # Build lookup of current squad with cost and position
     current_ids = {p["element"] for p in picks}
-    current_df = merged[merged["id"].isin(current_ids)].copy()
-    # Include minutes_ratio in the current player score
-    current_df["current_score"] = (
-        current_df["points_per_game"] * current_df["minutes_ratio"]
-    ) / (current_df["fdr_next6"] + 1e-3)
+    current_df = scored[scored["id"].isin(current_ids)]
+    # Ownership mask aligned with the pool, patched in place after each swap
+    pool_ids = pool["id"].to_numpy()
+    owned_mask = np.isin(pool_ids, np.fromiter(current_ids, dtype=np.int64))
 
     # Identify underperforming players (lowest scores)
-    worst_players = current_df.sort_values("current_score").head(max_transfers)
+    worst_players = current_df.iloc[top_k_indices(-current_df["score"].to_numpy(), max_transfers)]
 
     suggestions: list[tuple[str, str, float]] = []
     # Build a team count mapping to enforce max 3 per team in the new squad
     # Count current players per team
-    team_count = defaultdict(int)
-    for _, p_row in current_df.iterrows():
-        team_count[p_row["team"]] += 1
+    team_count = defaultdict(int, current_df["team"].value_counts().to_dict())
 
     # For each player to be replaced
     for _, row in worst_players.iterrows():
@@ -270,48 +508,44 @@ def suggest_transfer_moves(
         sell_cost = row["now_cost"] / 10.0
         position = row["element_type"]
         available_budget = bank + sell_cost
+        # now_cost is stored in tenths of a million, so compare as integers
+        budget_tenths = int(round(available_budget * 10))
 
-        # Candidates: same position, not currently owned, available, cost within budget, team limit not exceeded
-        candidates = merged[
-            (merged["element_type"] == position)
-            & (~merged["id"].isin(current_ids))
-            & (merged["status"] == "a")
-            & ((merged["now_cost"] / 10.0) <= available_budget)
-        ].copy()
+        # Candidates: same position, not currently owned, cost within budget.
+        # The pool is already restricted to available players and sorted by score.
+        candidates = pool[
+            (pool["element_type"] == position)
+            & ~owned_mask
+            & (pool["now_cost"] <= budget_tenths)
+        ]
 
         if candidates.empty:
             continue
-        # Compute candidate score
-        candidates["candidate_score"] = (
-            candidates["points_per_game"] * candidates["minutes_ratio"]
-        ) / (candidates["fdr_next6"] + 1e-3)
-        # Sort by score descending
-        candidates.sort_values("candidate_score", ascending=False, inplace=True)
         # Find the first candidate who does not break the 3‑per‑team rule
         selected_candidate = None
-        for _, cand in candidates.iterrows():
-            team_id = cand["team"]
+        for cand in candidates.itertuples(index=False):
+            team_id = cand.team
             # After replacing sell_id, we will remove from team_count of sell player's team
             # but we haven't removed yet; we evaluate candidate separately for each move
             # Only ensure candidate's team count does not exceed 3
-            if team_count[team_id] >= 3:
+            if team_count[team_id] >= MAX_PER_TEAM:
                 continue
             selected_candidate = cand
             break
         if selected_candidate is None:
             continue
 
-        buy_name = selected_candidate["web_name"]
-        buy_cost = selected_candidate["now_cost"] / 10.0
+        buy_name = selected_candidate.web_name
+        buy_cost = selected_candidate.now_cost / 10.0
         suggestions.append((sell_name, buy_name, buy_cost - sell_cost))
 
         # Update budget and current squads counts for subsequent suggestions
         bank += sell_cost - buy_cost
-        current_ids.remove(sell_id)
-        current_ids.add(int(selected_candidate["id"]))
+        owned_mask |= pool_ids == selected_candidate.id
+        owned_mask &= pool_ids != sell_id
         # Update team counts: remove sell and add buy
         team_count[row["team"]] -= 1
-        team_count[selected_candidate["team"]] += 1
+        team_count[selected_candidate.team] += 1
 
     return suggestions
 
@@ -319,11 +553,10 @@ def suggest_transfer_moves(
 def suggest_chip_play(
     manager_id: int,
     gameweek: int,
-    players_df: pd.DataFrame,
-    teams_df: pd.DataFrame,
-    fixtures_df: pd.DataFrame,
+    merged: pd.DataFrame,
     fdr_threshold: float = 3.5,
     injury_threshold: int = 3,
+    picks_data: dict | None = None,
 ) -> str | None:
     """Heuristically determine whether a Wildcard chip might be warranted.
 
@@ -333,26 +566,18 @@ def suggest_chip_play(
     are not automatically suggested because they depend heavily on blank/double
     gameweeks which this script cannot detect in this environment.
 
+    `merged` is the player table built by :func:`prepare_player_frame`.
+    `picks_data` may be passed to reuse already loaded picks.
+
     :returns: the name of the recommended chip ('wildcard') or None if no chip
     is recommended.
     """
-    picks_data = load_picks(manager_id, gameweek)
+    if picks_data is None:
+        picks_data = load_picks(manager_id, gameweek)
     picks = picks_data["picks"]
     # Determine which players are unavailable (status != 'a')
-    merged = players_df.merge(
-        teams_df[["id", "name", "short_name"]].rename(columns={"id": "team"}),
-        left_on="team",
-        right_on="team",
-        how="left",
-    )
-    # Map player id to status and team for FDR
     current_ids = {p["element"] for p in picks}
-    current_df = merged[merged["id"].isin(current_ids)].copy()
-    # Compute FDR per team
-    fdr_map: dict[int, float] = {}
-    for team_id in merged["team"].unique():
-        fdr_map[team_id] = compute_fdr_for_team(team_id, fixtures_df, weeks_ahead=6)
-    current_df["fdr_next6"] = current_df["team"].map(fdr_map)
+    current_df = merged[merged["id"].isin(current_ids)]
     unavailable = current_df[current_df["status"] != "a"]
     avg_fdr = current_df["fdr_next6"].mean() if not current_df.empty else 0.0
     # Recommend a wildcard if many players are injured/unavailable or the average
@@ -367,32 +592,134 @@ def show_current_team(
     gameweek: int,
     players_df: pd.DataFrame,
     teams_df: pd.DataFrame,
+    picks_data: dict | None = None,
 ) -> None:
     """Display the user's current squad with names, positions and basic stats.
 
     This function retrieves the manager's picks for the specified gameweek
     and matches the element IDs to player names.  It prints a table with
     position, name, cost (in £m), points per game and total minutes.
+    `picks_data` may be passed to reuse already loaded picks.
     """
-    picks_data = load_picks(manager_id, gameweek)
+    if picks_data is None:
+        picks_data = load_picks(manager_id, gameweek)
     ids = [p["element"] for p in picks_data["picks"]]
     subset = players_df[players_df["id"].isin(ids)].copy()
-    position_map = {1: "GKP", 2: "DEF", 3: "MID", 4: "FWD"}
-    subset["position"] = subset["element_type"].map(position_map)
+    subset["position"] = position_labels(subset["element_type"])
     subset["cost"] = subset["now_cost"] / 10.0
     cols = ["position", "web_name", "cost", "points_per_game", "minutes"]
     subset = subset[cols].sort_values(["position", "web_name"])
     print(subset.to_string(index=False))
 
 
+def _wildcard_solver():
+    """Return the CBC solver used for :func:`solve_wildcard_ilp`.
+
+    PuLP 3.3 deprecates its bundled ``PULP_CBC_CMD`` in favour of
+    ``COIN_CMD`` with a separately installed CBC (``pip install pulp[cbc]``).
+    Prefer that when it is available and otherwise fall back to the bundled
+    binary, silencing its deprecation warning.
+    """
+    solver = pulp.COIN_CMD(msg=False)
+    if solver.available():
+        return solver
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        return pulp.PULP_CBC_CMD(msg=False)
+
+
+def solve_wildcard_ilp(available: pd.DataFrame, budget_tenths: int) -> list[int] | None:
+    """Pick the highest-scoring legal squad from `available` exactly.
+
+    Squad selection is a small 0/1 integer programme: maximise the summed
+    `score` subject to the per-position counts in ``SQUAD_REQUIREMENTS``, at
+    most ``MAX_PER_TEAM`` players per club and a total `now_cost` within
+    `budget_tenths` (tenths of a million).  Players of any other element type
+    (e.g. the 2024/25 assistant managers) are never picked.  It is solved with
+    CBC, see :func:`_wildcard_solver`.
+
+    :returns: the selected player ids, or None if PuLP or a CBC binary is not
+        installed or no feasible squad exists.
+    """
+    if pulp is None:
+        return None
+    available = available[available["element_type"].isin(SQUAD_REQUIREMENTS)]
+    scores = np.nan_to_num(available["score"].to_numpy(dtype=float))
+    costs = available["now_cost"].to_numpy()
+    positions = available["element_type"].to_numpy()
+    teams = available["team"].to_numpy()
+    ids = available["id"].to_numpy()
+
+    prob = pulp.LpProblem("wildcard", pulp.LpMaximize)
+    x = [prob.add_variable(f"x{i}", cat="Binary") for i in range(len(ids))]
+    prob += pulp.lpSum(float(scores[i]) * x[i] for i in range(len(ids)))
+    for position, needed in SQUAD_REQUIREMENTS.items():
+        prob += pulp.lpSum(x[i] for i in np.flatnonzero(positions == position)) == needed
+    for team in np.unique(teams):
+        prob += pulp.lpSum(x[i] for i in np.flatnonzero(teams == team)) <= MAX_PER_TEAM
+    prob += pulp.lpSum(int(costs[i]) * x[i] for i in range(len(ids))) <= budget_tenths
+
+    try:
+        prob.solve(_wildcard_solver())
+    except pulp.PulpSolverError:
+        return None
+    if pulp.LpStatus[prob.status] != "Optimal":
+        return None
+    return [int(ids[i]) for i in range(len(ids)) if x[i].value() > 0.5]
+
+
+def greedy_wildcard_ids(available: pd.DataFrame, budget_tenths: int) -> list[int]:
+    """Fill each position in turn with the best-scoring affordable players.
+
+    Players are taken in descending `score` order, skipping anyone who would
+    exceed the remaining budget or the per-club limit.  Positions that cannot
+    be filled are left short.
+
+    :returns: the selected player ids.
+    """
+    # Sort once by score; each position group keeps that order
+    available = available.sort_values("score", ascending=False)
+    groups = {position: group for position, group in available.groupby("element_type", sort=False)}
+
+    # Container to track selected players and team counts
+    selected_ids: list[int] = []
+    team_counts: defaultdict[int, int] = defaultdict(int)
+    remaining_budget = budget_tenths
+
+    # Iterate through each position group
+    for position, needed in SQUAD_REQUIREMENTS.items():
+        # Available players within this position, by score descending
+        pool = groups.get(position, available.iloc[0:0])
+        # Plain NumPy arrays keep the greedy loop free of per-row pandas overhead
+        arr_team = pool["team"].to_numpy()
+        arr_cost = pool["now_cost"].to_numpy()
+        arr_id = pool["id"].to_numpy()
+
+        count = 0
+        for i in range(len(arr_id)):
+            if count >= needed:
+                break
+            # Check budget and team limit
+            if arr_cost[i] > remaining_budget:
+                continue
+            if team_counts[arr_team[i]] >= MAX_PER_TEAM:
+                continue
+            # Select player
+            selected_ids.append(int(arr_id[i]))
+            remaining_budget -= arr_cost[i]
+            team_counts[arr_team[i]] += 1
+            count += 1
+        # If we could not fill requirement due to budget/team constraints, we stop
+    return selected_ids
+
+
 def build_wildcard_team(
     manager_id: int,
     gameweek: int,
-    players_df: pd.DataFrame,
-    teams_df: pd.DataFrame,
-    fixtures_df: pd.DataFrame,
-    weeks_ahead: int = 6,
+    merged: pd.DataFrame,
+    team_short: dict[int, str],
     verbose: bool = True,
+    picks_data: dict | None = None,
 ) -> pd.DataFrame:
     """Construct a fresh 15‑man squad ignoring current picks using the manager's total budget.
 
@@ -405,156 +732,127 @@ def build_wildcard_team(
     squad value plus available bank.  The function returns a DataFrame
     containing the selected players sorted by position.
 
-    Note: This is a greedy approximation and may not always find the absolute
+    The squad is chosen by :func:`solve_wildcard_ilp`, which finds the
+    highest-scoring squad exactly when the optional ``pulp`` package is
+    installed.  Otherwise, or if the solver finds no feasible squad, the
+    greedy :func:`greedy_wildcard_ids` is used; it may not find the absolute
     optimal team, but it generally yields a strong squad within the budget.
 
     :param manager_id: FPL manager entry ID.
-    :param gameweek: current gameweek number (used to scale minutes).
-    :param players_df: full player data from bootstrap‑static.
-    :param teams_df: team information from bootstrap‑static.
-    :param fixtures_df: fixture list.
-    :param weeks_ahead: how many upcoming fixtures to consider when computing FDR.
+    :param gameweek: current gameweek number.
+    :param merged: player table built by :func:`prepare_player_frame`.
+    :param team_short: mapping of team id to short name.
     :param verbose: whether to print diagnostic information about budget usage.
+    :param picks_data: picks as returned by :func:`load_picks`; loaded if omitted.
     :returns: DataFrame with selected players and their attributes.
     """
     # Determine available budget: team value plus bank
-    picks_data = load_picks(manager_id, gameweek)
+    if picks_data is None:
+        picks_data = load_picks(manager_id, gameweek)
     entry = picks_data.get("entry_history", {})
     # value and bank are stored as integers in tenths of a million (e.g. 1003 => £100.3m)
     squad_value = entry.get("value", 0) / 10.0
     bank = entry.get("bank", 0) / 10.0
     total_budget = squad_value + bank
 
-    # Merge team info to compute FDR per team
-    merged = players_df.merge(
-        teams_df[["id", "name", "short_name"]].rename(columns={"id": "team"}),
-        left_on="team",
-        right_on="team",
-        how="left",
-    )
-    # Compute FDR map
-    fdr_map: dict[int, float] = {}
-    for team_id in merged["team"].unique():
-        fdr_map[team_id] = compute_fdr_for_team(team_id, fixtures_df, weeks_ahead)
-    merged["fdr_next"] = merged["team"].map(fdr_map)
-    merged["points_per_game"] = merged["points_per_game"].astype(float)
-    # Minutes ratio penalises players with limited playing time
-    max_minutes = max(gameweek, 1) * 90
-    merged["minutes_ratio"] = merged["minutes"] / max_minutes
-    merged["minutes_ratio"].fillna(0.0, inplace=True)
     # Only consider players who are available (status == 'a')
     available = merged[merged["status"] == "a"].copy()
     # Score: combine points per game and minutes, scaled by fixture difficulty
     available["score"] = (
         available["points_per_game"] * available["minutes_ratio"]
-    ) / (available["fdr_next"] + 1e-3)
+    ) / (available["fdr_next6"] + 1e-3)
 
-    # Define roster requirements per position (element_type)
-    position_requirements = {1: 2, 2: 5, 3: 5, 4: 3}
-    # Container to track selected players and team counts
-    selected_rows: list[dict] = []
-    team_counts: defaultdict[int, int] = defaultdict(int)
-    remaining_budget = total_budget
+    # Choose the squad exactly when possible, greedily otherwise
+    budget_tenths = entry.get("value", 0) + entry.get("bank", 0)
+    selected_ids = solve_wildcard_ilp(available, budget_tenths)
+    if selected_ids is None:
+        selected_ids = greedy_wildcard_ids(available, budget_tenths)
 
-    # Iterate through each position group
-    for position, needed in position_requirements.items():
-        # Sort available players within this position by score descending
-        pool = available[available["element_type"] == position].copy()
-        pool.sort_values(["score"], ascending=False, inplace=True)
-
-        count = 0
-        for _, player in pool.iterrows():
-            if count >= needed:
-                break
-            # Price in millions
-            price = player["now_cost"] / 10.0
-            # Check budget and team limit
-            if price > remaining_budget:
-                continue
-            if team_counts[player["team"]] >= 3:
-                continue
-            # Select player
-            selected_rows.append(player.to_dict())
-            remaining_budget -= price
-            team_counts[player["team"]] += 1
-            count += 1
-            # Break if requirement met
-            if count >= needed:
-                break
-        # If we could not fill requirement due to budget/team constraints, we stop
-        # Additional complex optimisation is beyond this script's scope
-
-    # Create DataFrame from selected players and compute derived fields
-    selected_df = pd.DataFrame(selected_rows)
+    # Look up the selected players in selection order, keeping the original
+    # dtypes, then compute derived fields
+    selected_df = merged.set_index("id").loc[selected_ids].reset_index()
     if selected_df.empty:
         return selected_df
-    position_map = {1: "GKP", 2: "DEF", 3: "MID", 4: "FWD"}
-    selected_df["Position"] = selected_df["element_type"].map(position_map)
     selected_df["Price"] = selected_df["now_cost"] / 10.0
     # Map team id to short name
-    team_lookup = teams_df.set_index("id")["short_name"].to_dict()
-    selected_df["Team"] = selected_df["team"].map(team_lookup)
-    # Compute upcoming fixtures string for each selected player
-    # Determine current gameweek from fixtures
-    current_gw = fixtures_df["event"].min()
-    selected_df["Fixtures"] = selected_df.apply(
-        lambda row: get_upcoming_fixtures(int(row["team"]), fixtures_df, teams_df, current_gw=current_gw, num_games=5),
-        axis=1,
-    )
+    selected_df["Team"] = selected_df["team"].map(team_short)
     # Rename stats columns for readability
-    selected_df.rename(
+    selected_df = selected_df.rename(
         columns={
             "web_name": "Name",
             "points_per_game": "Points_per_Game",
             "minutes": "Minutes",
-            "fdr_next": "Avg_FDR_next6",
-        },
-        inplace=True,
+            "fdr_next6": "Avg_FDR_next6",
+        }
     )
     # Select and order columns
     cols = ["Position", "Name", "Team", "Price", "Points_per_Game", "Minutes", "Avg_FDR_next6", "Fixtures"]
     selected_df = selected_df[cols].sort_values(["Position", "Name"])
 
     if verbose:
-        spent = total_budget - remaining_budget
+        spent = selected_df["Price"].sum()
+        remaining_budget = total_budget - spent
         print(f"\nWildcard selection built using £{spent:.1f}m of £{total_budget:.1f}m budget; £{remaining_budget:.1f}m remaining.")
 
     return selected_df
 
 
+def build_fixture_strings(
+    fixtures: pd.DataFrame,
+    team_short: dict[int, str],
+    current_gw: int | None = None,
+    num_games: int = 5,
+) -> dict[int, str]:
+    """Summarise the next `num_games` fixtures of every team in one pass.
+
+    Each fixture is formatted as "OPP (H/A,difficulty)", where OPP is the
+    opponent's short name from `team_short`, H/A indicates home or away, and
+    difficulty is the official FDR rating.  Fixtures are drawn from events on
+    or after `current_gw` and sorted by event; when `current_gw` is None,
+    `fixtures` is taken to hold only upcoming fixtures already.  Returns a
+    mapping of team id to the "; "-joined summary; teams without upcoming
+    fixtures are absent.
+    """
+    upcoming = fixtures if current_gw is None else fixtures[fixtures["event"] >= current_gw]
+    # Long format: one row per (team, fixture) from both the home and away side
+    home = pd.DataFrame(
+        {
+            "team": upcoming["team_h"],
+            "opp": upcoming["team_a"],
+            "loc": "H",
+            "difficulty": upcoming["team_h_difficulty"],
+            "event": upcoming["event"],
+        }
+    )
+    away = pd.DataFrame(
+        {
+            "team": upcoming["team_a"],
+            "opp": upcoming["team_h"],
+            "loc": "A",
+            "difficulty": upcoming["team_a_difficulty"],
+            "event": upcoming["event"],
+        }
+    )
+    long = pd.concat([home, away], ignore_index=True).sort_values(["team", "event"], kind="stable")
+    long = long.groupby("team").head(num_games)
+    opp_name = long["opp"].map(team_short).fillna(long["opp"].astype(str))
+    summary = opp_name + " (" + long["loc"] + "," + long["difficulty"].astype(str) + ")"
+    return summary.groupby(long["team"]).agg("; ".join).to_dict()
+
+
 def get_upcoming_fixtures(
     team_id: int,
     fixtures: pd.DataFrame,
-    teams_df: pd.DataFrame,
+    team_short: dict[int, str],
     current_gw: int,
     num_games: int = 5,
 ) -> str:
     """Return a string summarising the next `num_games` fixtures for the given team.
 
-    Each fixture is formatted as "OPP (H/A,difficulty)", where OPP is the
-    opponent's short name, H/A indicates home or away, and difficulty is the
-    official FDR rating.  Fixtures are drawn from events on or after the
-    current gameweek and sorted by event.
+    See :func:`build_fixture_strings` for the format; prefer that function
+    when summaries for several teams are needed.
     """
-    # Filter for upcoming fixtures for this team
-    upcoming = fixtures[(fixtures["event"] >= current_gw) & (
-        (fixtures["team_h"] == team_id) | (fixtures["team_a"] == team_id)
-    )].sort_values("event")
-    summaries: list[str] = []
-    # Build a lookup for team short names
-    team_lookup = teams_df.set_index("id")["short_name"].to_dict()
-    for _, row in upcoming.head(num_games).iterrows():
-        if row["team_h"] == team_id:
-            opp_id = row["team_a"]
-            difficulty = row["team_h_difficulty"]
-            loc = "H"
-        else:
-            opp_id = row["team_h"]
-            difficulty = row["team_a_difficulty"]
-            loc = "A"
-        opp_name = team_lookup.get(opp_id, str(opp_id))
-        summaries.append(f"{opp_name} ({loc},{difficulty})")
-    return "; ".join(summaries)
+    return build_fixture_strings(fixtures, team_short, current_gw, num_games).get(team_id, "")
 
 
 def main() -> None:
@@ -570,19 +868,31 @@ def main() -> None:
     args = parser.parse_args()
 
     print(f"Loading FPL data for manager {args.manager_id} (GW{args.gameweek})…")
-    players_df, teams_df = load_bootstrap()
-    fixtures_df = load_fixtures()
+    # The three endpoints are independent, so fetch them concurrently
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        bootstrap_future = executor.submit(load_bootstrap)
+        fixtures_future = executor.submit(load_fixtures)
+        picks_future = executor.submit(load_picks, args.manager_id, args.gameweek)
+        players_df, teams_df = bootstrap_future.result()
+        fixtures_df = fixtures_future.result()
+        picks_data = picks_future.result()
+    # Restrict fixtures to the current gameweek onwards once for all consumers
+    current_gw = int(fixtures_df["event"].min())
+    upcoming_fx = fixtures_df[fixtures_df["event"] >= current_gw]
+    team_short = dict(zip(teams_df["id"].to_numpy(), teams_df["short_name"].to_numpy()))
+    merged = prepare_player_frame(
+        players_df, teams_df, upcoming_fx, team_short, args.gameweek, current_gw=current_gw
+    )
 
     if args.wildcard:
         # Construct a completely new squad within the available budget
         new_team = build_wildcard_team(
             manager_id=args.manager_id,
             gameweek=args.gameweek,
-            players_df=players_df,
-            teams_df=teams_df,
-            fixtures_df=fixtures_df,
-            weeks_ahead=6,
+            merged=merged,
+            team_short=team_short,
             verbose=True,
+            picks_data=picks_data,
         )
         if new_team.empty:
             print("\nUnable to construct a wildcard squad within your budget and constraints.")
@@ -594,10 +904,10 @@ def main() -> None:
         suggestions = generate_transfer_suggestions(
             manager_id=args.manager_id,
             gameweek=args.gameweek,
-            players_df=players_df,
-            teams_df=teams_df,
-            fixtures_df=fixtures_df,
+            merged=merged,
+            team_short=team_short,
             top_n=args.top_n,
+            picks_data=picks_data,
         )
         print("\nTop transfer targets based on form and upcoming fixtures:")
         print(suggestions.to_string(index=False))
@@ -609,16 +919,16 @@ def main() -> None:
             gameweek=args.gameweek,
             players_df=players_df,
             teams_df=teams_df,
+            picks_data=picks_data,
         )
 
         # Provide budget‑aware transfer moves
         moves = suggest_transfer_moves(
             manager_id=args.manager_id,
             gameweek=args.gameweek,
-            players_df=players_df,
-            teams_df=teams_df,
-            fixtures_df=fixtures_df,
+            merged=merged,
             max_transfers=2,
+            picks_data=picks_data,
         )
         if moves:
             print("\nSuggested transfer moves (sell → buy, budget impact):")
@@ -634,9 +944,8 @@ def main() -> None:
         chip_suggestion = suggest_chip_play(
             manager_id=args.manager_id,
             gameweek=args.gameweek,
-            players_df=players_df,
-            teams_df=teams_df,
-            fixtures_df=fixtures_df,
+            merged=merged,
+            picks_data=picks_data,
         )
         if chip_suggestion:
             print(f"\nChip recommendation: consider playing your {chip_suggestion} chip.")
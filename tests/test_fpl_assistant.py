@@ -0,0 +1,468 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import fpl_assistant as fpl
+
+
+# --- Fixture difficulty ---
+
+@pytest.fixture
+def fixtures():
+    return pd.DataFrame(
+        {
+            "event": [5, 5, 6, 7, 12],
+            "team_h": [1, 3, 2, 1, 3],
+            "team_a": [2, 4, 3, 4, 1],
+            "team_h_difficulty": [2, 3, 4, 2, 5],
+            "team_a_difficulty": [4, 3, 2, 5, 1],
+        }
+    )
+
+
+def test_compute_fdr_map_defaults_to_first_event(fixtures):
+    # Window is gameweeks 5-10, so the gameweek 12 fixture is ignored
+    assert fpl.compute_fdr_map(fixtures, weeks_ahead=6) == {
+        1: 2.0,
+        2: 4.0,
+        3: 2.5,
+        4: 4.0,
+    }
+
+
+def test_compute_fdr_map_with_current_gw(fixtures):
+    assert fpl.compute_fdr_map(fixtures, weeks_ahead=2, current_gw=6) == {
+        1: 2.0,
+        2: 4.0,
+        3: 2.0,
+        4: 5.0,
+    }
+    # Teams without a fixture in the window are absent
+    assert fpl.compute_fdr_map(fixtures, weeks_ahead=1, current_gw=12) == {3: 5.0, 1: 1.0}
+
+
+# --- On-disk caches ---
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(fpl, "CACHE_DIR", tmp_path / "cache")
+    return tmp_path / "cache"
+
+
+def test_disk_cached_round_trip_respects_ttl(cache_dir, monkeypatch):
+    url = "https://example.test/api/data/"
+    monkeypatch.setattr(fpl, "CACHE_TTLS", {url: 60})
+    calls = []
+
+    @fpl.disk_cached
+    def fetch(u):
+        calls.append(u)
+        return {"n": len(calls)}
+
+    assert fetch(url) == {"n": 1}
+    assert fetch(url) == {"n": 1}
+    assert len(calls) == 1
+    assert not list(cache_dir.glob("*.tmp"))
+
+    # Age the entry past its TTL
+    real_time = time.time
+    monkeypatch.setattr(fpl.time, "time", lambda: real_time() + 61)
+    assert fetch(url) == {"n": 2}
+    assert len(calls) == 2
+
+
+def test_disk_cached_skips_uncached_urls(cache_dir, monkeypatch):
+    monkeypatch.setattr(fpl, "CACHE_TTLS", {})
+    calls = []
+
+    @fpl.disk_cached
+    def fetch(u):
+        calls.append(u)
+        return {}
+
+    fetch("https://example.test/other/")
+    fetch("https://example.test/other/")
+    assert len(calls) == 2
+    assert not cache_dir.exists()
+
+
+def test_parquet_cached_round_trip_respects_ttl(cache_dir):
+    pytest.importorskip("pyarrow")
+    calls = []
+
+    @fpl.parquet_cached("frames", ttl=60, parts=2)
+    def load():
+        calls.append(1)
+        players = pd.DataFrame({"id": [1, 2], "stats": [[1, 2], []]})
+        teams = pd.DataFrame({"id": [1], "short_name": ["ARS"]})
+        return players, teams
+
+    players, teams = load()
+    cached_players, cached_teams = load()
+    assert len(calls) == 1
+    # Nested columns are dropped whether or not the cache was hit
+    assert list(players.columns) == list(cached_players.columns) == ["id"]
+    pd.testing.assert_frame_equal(cached_teams, teams, check_dtype=False)
+    assert sorted(p.name for p in cache_dir.iterdir()) == ["frames-0.parquet", "frames-1.parquet"]
+
+    # Age the files past their TTL
+    stale = time.time() - 61
+    for path in cache_dir.glob("*.parquet"):
+        os.utime(path, (stale, stale))
+    load()
+    assert len(calls) == 2
+
+
+def test_clear_cache_removes_all_cache_files(cache_dir):
+    cache_dir.mkdir()
+    for name in ("a.json", "b.parquet", "c.tmp"):
+        (cache_dir / name).write_bytes(b"")
+    fpl.clear_cache()
+    assert not list(cache_dir.iterdir())
+
+
+# --- Shared player frame ---
+
+@pytest.fixture
+def teams_df():
+    return pd.DataFrame(
+        {
+            "id": [1, 2, 3, 4, 5],
+            "name": ["Arsenal", "Chelsea", "Liverpool", "Man City", "Spurs"],
+            "short_name": ["ARS", "CHE", "LIV", "MCI", "TOT"],
+        }
+    )
+
+
+@pytest.fixture
+def team_short(teams_df):
+    return dict(zip(teams_df["id"], teams_df["short_name"]))
+
+
+@pytest.fixture
+def season_fixtures():
+    """Gameweeks 4-12; team 6 plays but is missing from `teams_df`."""
+    rows = [
+        (4, 1, 3, 2, 4),
+        (5, 1, 2, 2, 4), (5, 3, 4, 3, 3),
+        (6, 2, 3, 4, 2), (6, 4, 1, 5, 1), (6, 5, 6, 2, 3),
+        (7, 1, 3, 3, 4), (7, 2, 4, 2, 5), (7, 6, 5, 4, 2),
+        (8, 3, 1, 4, 2), (8, 4, 2, 3, 3),
+        (9, 2, 1, 4, 2), (9, 4, 3, 2, 4), (9, 5, 1, 3, 3),
+        (10, 3, 2, 3, 3), (10, 1, 4, 4, 2),
+        (11, 1, 5, 2, 3), (11, 3, 5, 4, 2),
+        (12, 4, 1, 3, 3),
+    ]
+    columns = ["event", "team_h", "team_a", "team_h_difficulty", "team_a_difficulty"]
+    return pd.DataFrame(rows, columns=columns)
+
+
+@pytest.fixture
+def league_players():
+    rows = []
+    for team in range(1, 6):
+        for j, element_type in enumerate([1, 2, 2, 3, 3, 4]):
+            player_id = (team - 1) * 6 + j + 1
+            rows.append(
+                {
+                    "id": player_id,
+                    "web_name": f"P{player_id}",
+                    "team": team,
+                    "element_type": element_type,
+                    "now_cost": 40 + 5 * j + 3 * team,
+                    "points_per_game": round(player_id * 37 % 23 / 4, 2),
+                    "minutes": player_id * 53 % 540,
+                    "status": "i" if player_id % 7 == 0 else "a",
+                }
+            )
+    return pd.DataFrame(rows)
+
+
+def test_prepare_player_frame_adds_scoring_columns(
+    league_players, teams_df, season_fixtures, team_short
+):
+    merged = fpl.prepare_player_frame(
+        league_players, teams_df, season_fixtures, team_short, gameweek=6, current_gw=6
+    )
+    # One row per player, in the original order, with the team names merged in
+    assert merged["id"].tolist() == league_players["id"].tolist()
+    assert merged["short_name"].tolist() == league_players["team"].map(team_short).tolist()
+    # Per-team averages over gameweeks 6-11, as the original per-team loop computed them
+    expected_fdr = {1: 17 / 7, 2: 3.2, 3: 3.5, 4: 3.4, 5: 2.4}
+    assert merged["fdr_next6"].tolist() == pytest.approx(
+        league_players["team"].map(expected_fdr).tolist()
+    )
+    assert merged["minutes_ratio"].tolist() == pytest.approx(
+        (league_players["minutes"] / 540).tolist()
+    )
+    assert merged["Position"].tolist() == league_players["element_type"].map(fpl.POSITION_MAP).tolist()
+
+
+def test_prepare_player_frame_defaults_to_first_event(
+    league_players, teams_df, season_fixtures, team_short
+):
+    merged = fpl.prepare_player_frame(league_players, teams_df, season_fixtures, team_short, gameweek=6)
+    expected = fpl.compute_fdr_map(season_fixtures, 6, current_gw=4)
+    assert merged["fdr_next6"].tolist() == pytest.approx(league_players["team"].map(expected).tolist())
+
+
+# --- Fixture strings ---
+
+# Output of the original per-team iterrows implementation from gameweek 6 on
+BASELINE_FIXTURE_STRINGS = {
+    1: "MCI (A,1); LIV (H,3); LIV (A,2); CHE (A,2); TOT (A,3)",
+    2: "LIV (H,4); MCI (H,2); MCI (A,3); ARS (H,4); LIV (A,3)",
+    3: "CHE (A,2); ARS (A,4); ARS (H,4); MCI (A,4); CHE (H,3)",
+    4: "ARS (H,5); CHE (A,5); CHE (H,3); LIV (H,2); ARS (A,2)",
+    5: "6 (H,2); 6 (A,2); ARS (H,3); ARS (A,3); LIV (A,2)",
+    6: "TOT (A,3); TOT (H,4)",
+}
+
+
+def test_build_fixture_strings_matches_baseline(season_fixtures, team_short):
+    summaries = fpl.build_fixture_strings(season_fixtures, team_short, current_gw=6)
+    assert summaries == BASELINE_FIXTURE_STRINGS
+
+
+def test_build_fixture_strings_takes_prefiltered_fixtures(season_fixtures, team_short):
+    upcoming = season_fixtures[season_fixtures["event"] >= 6]
+    assert fpl.build_fixture_strings(upcoming, team_short) == BASELINE_FIXTURE_STRINGS
+    short = fpl.build_fixture_strings(upcoming, team_short, num_games=2)
+    assert short[1] == "MCI (A,1); LIV (H,3)"
+    assert short[6] == BASELINE_FIXTURE_STRINGS[6]
+
+
+@pytest.mark.parametrize("team_id", [1, 5, 6])
+def test_get_upcoming_fixtures_matches_batched_strings(season_fixtures, team_short, team_id):
+    summary = fpl.get_upcoming_fixtures(team_id, season_fixtures, team_short, current_gw=6)
+    assert summary == BASELINE_FIXTURE_STRINGS[team_id]
+
+
+def test_prepare_player_frame_maps_fixture_strings(
+    league_players, teams_df, season_fixtures, team_short
+):
+    merged = fpl.prepare_player_frame(
+        league_players, teams_df, season_fixtures, team_short, gameweek=6, current_gw=6
+    )
+    expected = league_players["team"].map(BASELINE_FIXTURE_STRINGS)
+    assert merged["Fixtures"].tolist() == expected.tolist()
+
+
+# --- Transfer moves ---
+
+@pytest.fixture
+def move_frame(teams_df, team_short):
+    """Two weak midfielders to sell and a handful of midfield replacements.
+
+    Every fixture has difficulty 3 and every player has full minutes, so the
+    score simply follows points_per_game.  Club 1 already has three players
+    in the squad.
+    """
+    rows = [
+        # id, web_name, team, element_type, now_cost, points_per_game, status
+        (1, "Sell1", 2, 3, 50, 1.0, "a"),
+        (2, "Sell2", 3, 3, 60, 1.5, "a"),
+        (3, "Own3", 1, 1, 45, 6.0, "a"),
+        (4, "Own4", 1, 2, 45, 6.0, "a"),
+        (5, "Own5", 1, 4, 70, 6.0, "a"),
+        (20, "ClubFull", 1, 3, 50, 9.0, "a"),
+        (21, "TooDear", 4, 3, 61, 8.0, "a"),
+        (22, "Exact", 5, 3, 55, 7.0, "a"),
+        (23, "Injured", 4, 3, 40, 6.5, "i"),
+        (24, "Cheap", 5, 3, 40, 4.0, "a"),
+        (25, "Defender", 4, 2, 40, 9.5, "a"),
+    ]
+    columns = ["id", "web_name", "team", "element_type", "now_cost", "points_per_game", "status"]
+    players = pd.DataFrame(rows, columns=columns).assign(minutes=540)
+    fixtures = pd.DataFrame(
+        {
+            "event": [6, 6, 7],
+            "team_h": [1, 3, 5],
+            "team_a": [2, 4, 1],
+            "team_h_difficulty": [3, 3, 3],
+            "team_a_difficulty": [3, 3, 3],
+        }
+    )
+    return fpl.prepare_player_frame(players, teams_df, fixtures, team_short, gameweek=6)
+
+
+def squad_picks(bank):
+    return {"picks": [{"element": e} for e in (1, 2, 3, 4, 5)], "entry_history": {"bank": bank}}
+
+
+# Output of the original implementation for each bank (in tenths of a million)
+BASELINE_MOVES = {
+    0: [("Sell1", "Cheap", -1.0), ("Sell2", "TooDear", 0.1)],
+    5: [("Sell1", "Exact", 0.5), ("Sell2", "Cheap", -2.0)],
+    6: [("Sell1", "Exact", 0.5), ("Sell2", "TooDear", 0.1)],
+    50: [("Sell1", "TooDear", 1.1), ("Sell2", "Exact", -0.5)],
+}
+
+
+@pytest.mark.parametrize("bank", sorted(BASELINE_MOVES))
+def test_suggest_transfer_moves_matches_baseline(move_frame, bank):
+    moves = fpl.suggest_transfer_moves(1, 6, move_frame, picks_data=squad_picks(bank))
+    expected = BASELINE_MOVES[bank]
+    assert [move[:2] for move in moves] == [move[:2] for move in expected]
+    assert [move[2] for move in moves] == pytest.approx([move[2] for move in expected])
+
+
+def test_suggest_transfer_moves_respects_club_limit_and_status(move_frame):
+    # The best midfielders are from a full club or injured, so never bought
+    moves = fpl.suggest_transfer_moves(1, 6, move_frame, max_transfers=5, picks_data=squad_picks(500))
+    bought = {buy for _, buy, _ in moves}
+    assert "ClubFull" not in bought
+    assert "Injured" not in bought
+    first = fpl.suggest_transfer_moves(1, 6, move_frame, max_transfers=1, picks_data=squad_picks(500))
+    assert first == [("Sell1", "TooDear", pytest.approx(1.1))]
+
+
+def test_suggest_transfer_moves_updates_ownership_between_moves(move_frame):
+    # TooDear is bought for Sell1, so Sell2 must fall back to the next best
+    moves = fpl.suggest_transfer_moves(1, 6, move_frame, picks_data=squad_picks(50))
+    assert [buy for _, buy, _ in moves] == ["TooDear", "Exact"]
+    # Players already in the squad are never suggested as buys
+    bought = {buy for _, buy, _ in moves}
+    assert bought.isdisjoint({"Sell1", "Sell2", "Own3", "Own4", "Own5"})
+
+
+@pytest.mark.parametrize(("bank", "first_buy"), [(4, "Cheap"), (5, "Exact")])
+def test_suggest_transfer_moves_budget_is_inclusive(move_frame, bank, first_buy):
+    # Selling Sell1 (5.0m) frees exactly 5.5m with a 0.5m bank: Exact costs 5.5m
+    moves = fpl.suggest_transfer_moves(1, 6, move_frame, max_transfers=1, picks_data=squad_picks(bank))
+    assert moves[0][1] == first_buy
+
+
+def test_suggest_transfer_moves_budget_survives_float_rounding(move_frame):
+    # 0.1m bank + 5.1m sale is 5.1999... in floating point, which made the
+    # original float comparison reject a 5.2m replacement
+    costs = {"Sell1": 51, "Exact": 52}
+    frame = move_frame.assign(
+        now_cost=move_frame["web_name"].map(costs).fillna(move_frame["now_cost"]).astype(int)
+    )
+    moves = fpl.suggest_transfer_moves(1, 6, frame, max_transfers=1, picks_data=squad_picks(1))
+    assert moves == [("Sell1", "Exact", pytest.approx(0.1))]
+
+
+# --- Position labels ---
+
+def test_position_labels_are_ordered_and_tolerate_unknown_types():
+    labels = fpl.position_labels(pd.Series([4, 1, 5, 2, 3]))
+    assert list(labels.categories) == ["GKP", "DEF", "MID", "FWD"]
+    assert labels.ordered
+    assert labels.isna().tolist() == [False, False, True, False, False]
+    assert list(labels.dropna()) == ["FWD", "GKP", "DEF", "MID"]
+
+
+# --- Top-k selection ---
+
+def test_score_and_topk_returns_best_scores_first():
+    rng = np.random.default_rng(1)
+    ppg = rng.uniform(0, 8, size=60)
+    minutes_ratio = rng.uniform(0, 1, size=60)
+    fdr = rng.uniform(1, 5, size=60)
+    idx, scores = fpl.score_and_topk(ppg, minutes_ratio, fdr, 10)
+
+    all_scores = ppg * minutes_ratio / (fdr + 1e-3)
+    assert np.array_equal(idx, np.argsort(-all_scores)[:10])
+    assert np.array_equal(scores, all_scores[idx])
+    assert np.all(np.diff(scores) <= 0)
+
+
+@pytest.mark.parametrize("k", [0, 1, 5, 50, 200])
+def test_top_k_indices_matches_full_sort(k):
+    rng = np.random.default_rng(0)
+    # Integer scores give plenty of ties
+    scores = rng.integers(0, 20, size=100).astype(float)
+    idx = fpl.top_k_indices(scores, k)
+    # Ties at the cut-off may pick different positions, so compare the scores
+    assert np.array_equal(scores[idx], np.sort(scores)[::-1][:k])
+    assert len(np.unique(idx)) == len(idx)
+
+
+# --- Wildcard squad selection ---
+
+@pytest.fixture
+def player_pool():
+    """Synthetic player pool where one club has all the best players."""
+    rng = np.random.default_rng(2)
+    rows = []
+    player_id = 1
+    for element_type in fpl.SQUAD_REQUIREMENTS:
+        for team in range(1, 11):
+            for _ in range(3):
+                rows.append(
+                    {
+                        "id": player_id,
+                        "element_type": element_type,
+                        "team": team,
+                        "now_cost": int(rng.integers(40, 130)),
+                        "score": rng.uniform(0, 5) + (10 if team == 1 else 0),
+                    }
+                )
+                player_id += 1
+    return pd.DataFrame(rows)
+
+
+def assert_legal_squad(pool, ids, budget_tenths):
+    squad = pool[pool["id"].isin(ids)]
+    assert len(squad) == len(ids) == sum(fpl.SQUAD_REQUIREMENTS.values())
+    assert squad["element_type"].value_counts().to_dict() == fpl.SQUAD_REQUIREMENTS
+    assert squad["team"].value_counts().max() <= fpl.MAX_PER_TEAM
+    assert squad["now_cost"].sum() <= budget_tenths
+
+
+@pytest.mark.parametrize("budget_tenths", [1000, 1200])
+def test_solve_wildcard_ilp_respects_squad_rules(player_pool, budget_tenths):
+    pytest.importorskip("pulp")
+    ids = fpl.solve_wildcard_ilp(player_pool, budget_tenths)
+    assert ids is not None
+    assert_legal_squad(player_pool, ids, budget_tenths)
+
+
+@pytest.mark.parametrize("budget_tenths", [800, 1000])
+def test_greedy_wildcard_ids_never_breaks_squad_rules(player_pool, budget_tenths):
+    # Greedy may leave positions short on a tight budget, but never overfills
+    ids = fpl.greedy_wildcard_ids(player_pool, budget_tenths)
+    squad = player_pool[player_pool["id"].isin(ids)]
+    assert len(squad) == len(ids)
+    for element_type, count in squad["element_type"].value_counts().items():
+        assert count <= fpl.SQUAD_REQUIREMENTS[element_type]
+    assert squad["team"].value_counts().max() <= fpl.MAX_PER_TEAM
+    assert squad["now_cost"].sum() <= budget_tenths
+
+
+def test_greedy_wildcard_ids_fills_squad_with_ample_budget(player_pool):
+    ids = fpl.greedy_wildcard_ids(player_pool, 2000)
+    assert_legal_squad(player_pool, ids, 2000)
+
+
+def test_ilp_scores_at_least_as_well_as_greedy(player_pool):
+    pytest.importorskip("pulp")
+    budget_tenths = 1000
+    ilp_ids = fpl.solve_wildcard_ilp(player_pool, budget_tenths)
+    greedy_ids = fpl.greedy_wildcard_ids(player_pool, budget_tenths)
+    score = player_pool.set_index("id")["score"]
+    assert score[ilp_ids].sum() >= score[greedy_ids].sum() - 1e-9
+
+
+def test_solve_wildcard_ilp_ignores_unknown_element_types(player_pool):
+    pytest.importorskip("pulp")
+    manager = {"id": 999, "element_type": 5, "team": 2, "now_cost": 5, "score": 100.0}
+    pool = pd.concat([player_pool, pd.DataFrame([manager])], ignore_index=True)
+    ids = fpl.solve_wildcard_ilp(pool, 1000)
+    assert 999 not in ids
+    assert_legal_squad(pool, ids, 1000)
+
+
+def test_solve_wildcard_ilp_returns_none_without_solver(player_pool, monkeypatch):
+    pulp = pytest.importorskip("pulp")
+
+    def missing_solver(*args, **kwargs):
+        raise pulp.PulpSolverError("cbc not found")
+
+    monkeypatch.setattr(pulp.LpProblem, "solve", missing_solver)
+    assert fpl.solve_wildcard_ilp(player_pool, 1000) is None
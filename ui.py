@@ -1,11 +1,23 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
+
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+import numpy as np
 import pandas as pd
 from fpl_assistant import (
-    load_bootstrap, load_fixtures,
+    clear_cache, load_bootstrap, load_fixtures, load_picks, prepare_player_frame,
     generate_transfer_suggestions, build_wildcard_team,
     suggest_transfer_moves, suggest_chip_play
 )
 
+# Arrow-backed string columns: faster .str ops and no conversion when tables
+# are sent to the browser (pandas >= 2.1; Streamlit already ships pyarrow)
+try:
+    pd.set_option("future.infer_string", True)
+except pd.errors.OptionError:
+    pass
+
 # --- Manager mapping ---
 manager_map = {
     "Brandon": 1548623,
@@ -14,12 +26,50 @@ manager_map = {
     "Bart": 2111015,
     "Nick": 3977511
 }
+_MANAGER_NAMES = tuple(manager_map)
+
+# --- NL kolomnamen ---
+_SUGG_COLS = {
+    "Name": "Speler",
+    "Team": "Club",
+    "Position": "Positie",
+    "Price": "Prijs (M)",
+    "Points_per_Game": "Punten/Gem",
+    "Avg_FDR_next6": "Gem Moeilijkheid (6)",
+    "Score": "Score",
+    "Fixtures": "Programma"
+}
+_SQUAD_COLS = {
+    "Name": "Speler",
+    "Team": "Club",
+    "Position": "Positie",
+    "Price": "Prijs (M)",
+    "Points_per_Game": "Punten/Gem",
+    "Minutes": "Minuten",
+    "Avg_FDR_next6": "Gem Moeilijkheid (6)",
+    "Fixtures": "Programma"
+}
+
+# --- Title HTML ---
+_TITLE_HTML = """
+    <h1 style="background: linear-gradient(90deg, #7b2ff7, #00c6ff);
+               -webkit-background-clip: text;
+               -webkit-text-fill-color: transparent;
+               font-weight: 900; text-align:center;">
+    ⚽ Fantasy Premier League Assistant
+    </h1>
+    """
 
 # --- Page setup ---
 st.set_page_config(page_title="FPL Assistant", layout="wide")
 
 # --- Custom CSS for PL style ---
-def load_css(dark=False):
+# Built once per theme and kept across reruns (the script's own namespace is
+# fresh on every rerun, so a plain lru_cache would never hit); the block itself
+# must still be emitted on every rerun, because Streamlit drops elements a
+# rerun does not re-emit.
+@st.cache_resource(show_spinner=False)
+def _css(dark):
     if dark:
         bg = "#0d1117"
         text = "#e6edf3"
@@ -29,25 +79,12 @@ def load_css(dark=False):
         text = "#1a1a1a"
         card_bg = "#ffffff"
 
-    st.markdown(
-        f"""
+    return f"""
         <style>
         body, .main, .block-container {{
             background: {bg} !important;
             color: {text} !important;
         }}
-        .stTabs [role="tablist"] button[role="tab"] {{
-            border-radius: 6px;
-            padding: 8px 16px;
-            margin: 0 4px;
-            background: linear-gradient(90deg, #7b2ff7, #00c6ff);
-            color: white !important;
-            font-weight: bold;
-            border: none;
-        }}
-        .stTabs [role="tablist"] {{
-            background: transparent !important;
-        }}
         .card {{
             background: {card_bg};
             padding: 20px;
@@ -56,9 +93,10 @@ def load_css(dark=False):
             box-shadow: 0 4px 12px rgba(0,0,0,0.15);
         }}
         </style>
-        """,
-        unsafe_allow_html=True
-    )
+        """
+
+def load_css(dark=False):
+    st.markdown(_css(dark), unsafe_allow_html=True)
 
 # --- Sidebar ---
 st.sidebar.header("⚙️ Instellingen")
@@ -66,114 +104,177 @@ theme = st.sidebar.selectbox("Thema", ["🌞 Licht", "🌙 Donker"])
 dark_mode = theme == "🌙 Donker"
 load_css(dark=dark_mode)
 
-selected_manager = st.sidebar.selectbox("Manager", list(manager_map.keys()))
+selected_manager = st.sidebar.selectbox("Manager", _MANAGER_NAMES)
 manager_id = manager_map[selected_manager]
 
 gameweek = st.sidebar.number_input("Gameweek", min_value=1, value=6, step=1)
 
-# --- Title ---
-st.markdown(
-    """
-    <h1 style="background: linear-gradient(90deg, #7b2ff7, #00c6ff);
-               -webkit-background-clip: text;
-               -webkit-text-fill-color: transparent;
-               font-weight: 900; text-align:center;">
-    ⚽ Fantasy Premier League Assistant
-    </h1>
-    """,
-    unsafe_allow_html=True,
+# Results are cached; this is the only way to force fresh FPL data early
+def _refresh_data():
+    clear_cache()
+    st.cache_data.clear()
+
+st.sidebar.button("🔄 Data verversen", on_click=_refresh_data)
+
+# Only the selected view is computed on each rerun
+view = st.sidebar.radio(
+    "Weergave",
+    ["🔄 Transfer Targets", "🃏 Wildcard Squad", "📋 Transfer Moves", "🎲 Chip Suggestion"],
 )
 
+# --- Title ---
+st.markdown(_TITLE_HTML, unsafe_allow_html=True)
+
 # --- Fixtures formatter ---
-def color_fixtures(fixtures_str: str) -> str:
-    parts = fixtures_str.split("; ")
-    styled = []
-    for p in parts:
-        try:
-            diff = int(p.split(",")[-1].replace(")", ""))
-        except:
-            diff = 3
-        if diff <= 2:
-            color = "green"
-        elif diff == 3:
-            color = "orange"
-        else:
-            color = "red"
-        styled.append(f"<span style='color:{color}; font-weight:bold'>{p}</span>")
-    return " | ".join(styled)
+# Difficulty at the end of a fixture string, e.g. the 4 in "ARS (H,4)"
+_DIFF_RE = re.compile(r"(\d+)\)$")
+
+def color_fixtures(fixtures: pd.Series) -> pd.Series:
+    # One row per fixture, e.g. "ARS (H,4)"; missing difficulty counts as 3.
+    # A coloured marker per fixture keeps the column plain text, so it can be
+    # rendered by st.dataframe without any HTML.
+    if fixtures.empty:
+        return fixtures
+    exploded = fixtures.str.split("; ").explode()
+    diff = exploded.str.extract(_DIFF_RE)[0].fillna("3").astype(int)
+    marker = pd.Series(
+        np.select([diff <= 2, diff == 3], ["🟢", "🟠"], default="🔴"),
+        index=exploded.index,
+    )
+    # Teams without upcoming fixtures have an empty string; keep those blank
+    styled = (marker.where(exploded != "", "") + " " + exploded).str.strip()
+    return styled.groupby(level=0, sort=False).agg(" | ".join)
+
+# Average FDR shown as a bar on the 1–5 difficulty scale
+_FDR_COLUMN_CONFIG = {
+    "Gem Moeilijkheid (6)": st.column_config.ProgressColumn(
+        min_value=1, max_value=5, format="%.2f"
+    ),
+}
+
+# --- Cached loaders (shared across reruns and sessions) ---
+@st.cache_data(ttl=3600, show_spinner=False)
+def _cached_bootstrap():
+    return load_bootstrap()
+
+@st.cache_data(ttl=600, show_spinner=False)
+def _cached_fixtures():
+    return load_fixtures()
+
+@st.cache_data(ttl=600, show_spinner=False)
+def _cached_picks(mid, gw):
+    return load_picks(mid, gw)
+
+@st.cache_data(ttl=600, show_spinner=False)
+def _prepared(gw):
+    players_df, teams_df = _cached_bootstrap()
+    fixtures_df = _cached_fixtures()
+    current_gw = int(fixtures_df["event"].min())
+    upcoming_fx = fixtures_df[fixtures_df["event"] >= current_gw]
+    team_short = dict(zip(teams_df["id"].to_numpy(), teams_df["short_name"].to_numpy()))
+    merged = prepare_player_frame(players_df, teams_df, upcoming_fx, team_short, gw, current_gw=current_gw)
+    return merged, team_short
+
+# --- Cached analyses: only a manager/gameweek change recomputes these ---
+# Tables are cached display-ready (coloured fixtures, NL kolomnamen)
+@st.cache_data(ttl=600, show_spinner=False)
+def _suggestions(mid, gw):
+    merged, team_short = _prepared(gw)
+    suggestions = generate_transfer_suggestions(
+        mid, gw, merged, team_short, top_n=5, picks_data=_cached_picks(mid, gw)
+    )
+    suggestions["Fixtures"] = color_fixtures(suggestions["Fixtures"])
+    suggestions.columns = [_SUGG_COLS.get(c, c) for c in suggestions.columns]
+    return suggestions
+
+@st.cache_data(ttl=600, show_spinner=False)
+def _squad(mid, gw):
+    merged, team_short = _prepared(gw)
+    squad = build_wildcard_team(
+        mid, gw, merged, team_short, picks_data=_cached_picks(mid, gw)
+    )
+    if not squad.empty:
+        squad["Fixtures"] = color_fixtures(squad["Fixtures"])
+        squad.columns = [_SQUAD_COLS.get(c, c) for c in squad.columns]
+    return squad
+
+@st.cache_data(ttl=600, show_spinner=False)
+def _moves(mid, gw):
+    merged, _ = _prepared(gw)
+    return suggest_transfer_moves(mid, gw, merged, picks_data=_cached_picks(mid, gw))
+
+@st.cache_data(ttl=600, show_spinner=False)
+def _chip(mid, gw):
+    merged, _ = _prepared(gw)
+    return suggest_chip_play(mid, gw, merged, picks_data=_cached_picks(mid, gw))
 
 # --- Load data ---
 with st.spinner("FPL data ophalen..."):
-    players_df, teams_df = load_bootstrap()
-    fixtures_df = load_fixtures()
+    # The three API calls are independent; on a cold cache fetch them at once.
+    # Workers get this run's context so st.cache_data behaves as in the script.
+    with ThreadPoolExecutor(
+        max_workers=3, initializer=add_script_run_ctx, initargs=(None, get_script_run_ctx())
+    ) as ex:
+        futures = [
+            ex.submit(_cached_bootstrap),
+            ex.submit(_cached_fixtures),
+            ex.submit(_cached_picks, manager_id, gameweek),
+        ]
+        for future in futures:
+            future.result()
+    _prepared(gameweek)
 
-# --- Tabs ---
-tab1, tab2, tab3, tab4 = st.tabs(
-    ["🔄 Transfer Targets", "🃏 Wildcard Squad", "📋 Transfer Moves", "🎲 Chip Suggestion"]
-)
+# --- Fragments: widget interactions inside rerun only the fragment ---
+@st.fragment
+def _chip_view(mid, gw):
+    chip = _chip(mid, gw)
+    if chip:
+        st.success(f"Gebruik je **{chip.upper()}** chip!")
+    else:
+        st.info("Geen chip nodig deze week.")
 
-with tab1:
+# --- Views ---
+if view == "🔄 Transfer Targets":
     st.markdown('<div class="card">', unsafe_allow_html=True)
     st.subheader("Top Transfer Targets")
-    suggestions = generate_transfer_suggestions(
-        manager_id, gameweek, players_df, teams_df, fixtures_df, top_n=5
+    suggestions = _suggestions(manager_id, gameweek)
+    st.dataframe(
+        suggestions, column_config=_FDR_COLUMN_CONFIG,
+        hide_index=True, use_container_width=True
     )
-    # NL kolomnamen
-    suggestions.rename(columns={
-        "Name": "Speler",
-        "Team": "Club",
-        "Position": "Positie",
-        "Price": "Prijs (M)",
-        "Points_per_Game": "Punten/Gem",
-        "Avg_FDR_next6": "Gem Moeilijkheid (6)",
-        "Score": "Score",
-        "Fixtures": "Programma"
-    }, inplace=True)
-    # Fixtures kleuren
-    suggestions["Programma"] = suggestions["Programma"].apply(color_fixtures)
-    st.write(suggestions.to_html(escape=False), unsafe_allow_html=True)
     st.markdown('</div>', unsafe_allow_html=True)
 
-with tab2:
+elif view == "🃏 Wildcard Squad":
     st.markdown('<div class="card">', unsafe_allow_html=True)
     st.subheader("Wildcard Squad")
-    squad = build_wildcard_team(manager_id, gameweek, players_df, teams_df, fixtures_df)
+    squad = _squad(manager_id, gameweek)
     if squad.empty:
         st.warning("Geen geldige wildcard squad binnen budget.")
     else:
-        squad.rename(columns={
-            "Name": "Speler",
-            "Team": "Club",
-            "Position": "Positie",
-            "Price": "Prijs (M)",
-            "Points_per_Game": "Punten/Gem",
-            "Minutes": "Minuten",
-            "Avg_FDR_next6": "Gem Moeilijkheid (6)",
-            "Fixtures": "Programma"
-        }, inplace=True)
-        squad["Programma"] = squad["Programma"].apply(color_fixtures)
-        st.write(squad.to_html(escape=False), unsafe_allow_html=True)
+        st.dataframe(
+            squad, column_config=_FDR_COLUMN_CONFIG,
+            hide_index=True, use_container_width=True
+        )
     st.markdown('</div>', unsafe_allow_html=True)
 
-with tab3:
+elif view == "📋 Transfer Moves":
     st.markdown('<div class="card">', unsafe_allow_html=True)
     st.subheader("Budget-aware Transfer Moves")
-    moves = suggest_transfer_moves(manager_id, gameweek, players_df, teams_df, fixtures_df)
+    moves = _moves(manager_id, gameweek)
     if moves:
+        lines = []
         for sell, buy, delta in moves:
             sign = f"{delta:+.1f}m"
             color = "🟢" if delta > 0 else "🔴" if delta < 0 else "🔵"
-            st.markdown(f"{color} **{sell} → {buy}** ({sign})")
+            lines.append(f"{color} **{sell} → {buy}** ({sign})")
+        # One markdown element for all moves instead of one per move
+        st.markdown("\n\n".join(lines))
     else:
         st.info("Geen verstandige transfer moves gevonden.")
     st.markdown('</div>', unsafe_allow_html=True)
 
-with tab4:
+elif view == "🎲 Chip Suggestion":
     st.markdown('<div class="card">', unsafe_allow_html=True)
     st.subheader("Chip Suggestion")
-    chip = suggest_chip_play(manager_id, gameweek, players_df, teams_df, fixtures_df)
-    if chip:
-        st.success(f"Gebruik je **{chip.upper()}** chip!")
-    else:
-        st.info("Geen chip nodig deze week.")
+    _chip_view(manager_id, gameweek)
     st.markdown('</div>', unsafe_allow_html=True)